@@ -1 +1 @@
-from .ip_sensor import *
\ No newline at end of file
+from .ip_sensor import *
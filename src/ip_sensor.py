@@ -1,5 +1,11 @@
 # Standard library
-import subprocess
+import asyncio
+import ctypes
+import os
+import signal
+import socket
+import sys
+import time
 from typing import Any, Dict, Mapping, Optional
 from typing_extensions import Self
 
@@ -8,20 +14,137 @@ from viam.components.sensor import Sensor
 from viam.logging import getLogger
 from viam.module.types import Reconfigurable, Stoppable
 from viam.proto.app.robot import ComponentConfig
-from viam.proto.common import  ResourceName
+from viam.proto.common import ResourceName
 from viam.resource.base import ResourceBase
 from viam.resource.types import Model, ModelFamily
 
 LOGGER = getLogger(__name__)
 
+# net/if.h interface flags
+IFF_UP = 0x1
+IFF_LOOPBACK = 0x8
+
+
+class _Ifaddrs(ctypes.Structure):
+    pass
+
+
+_Ifaddrs._fields_ = [
+    ("ifa_next", ctypes.POINTER(_Ifaddrs)),
+    ("ifa_name", ctypes.c_char_p),
+    ("ifa_flags", ctypes.c_uint),
+    ("ifa_addr", ctypes.c_void_p),
+    ("ifa_netmask", ctypes.c_void_p),
+    ("ifa_ifu", ctypes.c_void_p),
+    ("ifa_data", ctypes.c_void_p),
+]
+
+
+def _host_addresses() -> str:
+    """Return the output of Linux `hostname -I` without spawning it.
+
+    Like the real command, this walks getifaddrs() in order, skips interfaces that are
+    down or loopback and IPv6 link-local addresses, and prints each address followed
+    by a space.
+    """
+    libc = ctypes.CDLL(None, use_errno=True)
+    head = ctypes.POINTER(_Ifaddrs)()
+    if libc.getifaddrs(ctypes.byref(head)) != 0:
+        errno = ctypes.get_errno()
+        raise OSError(errno, os.strerror(errno))
+
+    output = ""
+    try:
+        ifa = head
+        while ifa:
+            entry = ifa.contents
+            ifa = entry.ifa_next
+            if (
+                not entry.ifa_addr
+                or entry.ifa_flags & IFF_LOOPBACK
+                or not entry.ifa_flags & IFF_UP
+            ):
+                continue
+
+            # Linux sockaddr_in/sockaddr_in6 layout: family, port, then the address
+            family = ctypes.c_ushort.from_address(entry.ifa_addr).value
+            if family == socket.AF_INET:
+                host = socket.inet_ntop(family, ctypes.string_at(entry.ifa_addr + 4, 4))
+            elif family == socket.AF_INET6:
+                packed = ctypes.string_at(entry.ifa_addr + 8, 16)
+                if (packed[0] == 0xFE and packed[1] & 0xC0 == 0x80) or (
+                    packed[0] == 0xFF and packed[1] & 0x0F == 0x2
+                ):
+                    # Link-local unicast or multicast
+                    continue
+                host = socket.inet_ntop(family, packed)
+                # getnameinfo() prints any scope of a non-link-local address numerically
+                scope_id = ctypes.c_uint32.from_address(entry.ifa_addr + 24).value
+                if scope_id:
+                    host = "{}%{}".format(host, scope_id)
+            else:
+                continue
+            output += host + " "
+    finally:
+        libc.freeifaddrs(head)
+    return output
+
+
+# Commands answered in-process instead of spawning a shell; each must print exactly
+# what the real command would
+NATIVE_RESOLVERS = {}
+if sys.platform.startswith("linux"):
+    NATIVE_RESOLVERS["hostname -I"] = _host_addresses
+
+# IP lookups whose output rarely changes, so they are cached by default
+IP_LOOKUP_CMDS = frozenset(
+    ["hostname -I", "ifconfig", "ip addr", "ip a", "ip -4 addr", "ip -6 addr"]
+)
+
+# Seconds to reuse an IP_LOOKUP_CMDS output when cache_ttl is not configured
+DEFAULT_CACHE_TTL = 5.0
+
+# Readers for each supported attribute type, keyed by the expected Python type
+ATTRIBUTE_GETTERS = {
+    bool: lambda field: field.bool_value,
+    int: lambda field: int(field.number_value),
+    float: lambda field: field.number_value,
+    str: lambda field: field.string_value,
+    list: lambda field: list(field.list_value),
+    dict: lambda field: dict(field.struct_value),
+}
+
+
+def get_attribute_from_config(
+    config: ComponentConfig, attribute_name: str, default, of_type=None
+):
+    if attribute_name not in config.attributes.fields:
+        return default
+
+    if default is None:
+        if of_type is None:
+            raise Exception("If default value is None, of_type argument can't be empty")
+        type_default = of_type
+    else:
+        type_default = type(default)
+
+    getter = ATTRIBUTE_GETTERS.get(type_default)
+    if getter is None:
+        return None
+    return getter(config.attributes.fields[attribute_name])
+
+
 class IPSensor(Sensor, Reconfigurable, Stoppable):
     family = ModelFamily("viam", "sensor")
     MODEL = Model(family, "ip-address")
 
     cmd: str
-    
+    cache_ttl: float
+
     @classmethod
-    def new(cls, config: ComponentConfig, dependencies: Mapping[ResourceName, ResourceBase]) -> Self:
+    def new(
+        cls, config: ComponentConfig, dependencies: Mapping[ResourceName, ResourceBase]
+    ) -> Self:
         service = cls(config.name)
         service.validate(config)
         service.reconfigure(config, dependencies)
@@ -31,44 +154,83 @@ class IPSensor(Sensor, Reconfigurable, Stoppable):
     def validate(cls, config: ComponentConfig) -> None:
         return None
 
-    def reconfigure(self, config: ComponentConfig, dependencies: Mapping[ResourceName, ResourceBase]) -> None:
+    def reconfigure(
+        self, config: ComponentConfig, dependencies: Mapping[ResourceName, ResourceBase]
+    ) -> None:
+        # Extract dial_info
+        self.cmd = get_attribute_from_config(config, "cmd", None, str)
+        self._key = "{}: ".format(self.cmd)
 
-        def get_attribute_from_config(attribute_name: str, default, of_type=None):
-            if attribute_name not in config.attributes.fields:
-                return default
+        # Pick how readings are produced once, rather than on every call
+        self._resolver = NATIVE_RESOLVERS.get(self.cmd)
+        if self._resolver is not None:
+            self._get_readings_impl = self._resolve_natively
+        else:
+            self._get_readings_impl = self._resolve_with_subprocess
 
-            if default is None:
-                if of_type is None:
-                    raise Exception(
-                        "If default value is None, of_type argument can't be empty"
-                    )
-                type_default = of_type
-            else:
-                type_default = type(default)
-
-            if type_default == bool:
-                return config.attributes.fields[attribute_name].bool_value
-            elif type_default == int:
-                return int(config.attributes.fields[attribute_name].number_value)
-            elif type_default == float:
-                return config.attributes.fields[attribute_name].number_value
-            elif type_default == str:
-                return config.attributes.fields[attribute_name].string_value
-            elif type_default == list:
-                return list(config.attributes.fields[attribute_name].list_value)
-            elif type_default == dict:
-                return dict(config.attributes.fields[attribute_name].struct_value)
-    
-        # Extract dial_info
-        self.cmd = get_attribute_from_config("cmd", None, str)
+        # Only cache IP lookups by default; arbitrary commands are re-run every
+        # time unless cache_ttl is set
+        self.cache_ttl = get_attribute_from_config(config, "cache_ttl", None, float)
+        if self.cache_ttl is None:
+            self.cache_ttl = DEFAULT_CACHE_TTL if self.cmd in IP_LOOKUP_CMDS else 0.0
+
+        # Drop any output cached for the previous cmd. Bumping the generation stops
+        # reads still in flight for the old cmd from refilling the new cache.
+        self._cache_generation = getattr(self, "_cache_generation", 0) + 1
+        self._cache_lock = asyncio.Lock()
+        self._cache_ts: Optional[float] = None
+        self._cache_val = ""
 
         return None
 
-    async def get_readings(self, extra: Optional[Dict[str, Any]] = None, **kwargs) -> Mapping[str, Any]:
-        p = subprocess.run(self.cmd, stdout=subprocess.PIPE, shell=True)
-        output = p.stdout.decode('utf-8').strip("\n")
-        return {"{}: ".format(self.cmd): output}
+    async def get_readings(
+        self, extra: Optional[Dict[str, Any]] = None, **kwargs
+    ) -> Mapping[str, Any]:
+        if self.cache_ttl <= 0:
+            return {self._key: await self._get_readings_impl()}
+
+        # Bind everything tied to the current config before awaiting, since a
+        # reconfigure may land while this read is in flight
+        key = self._key
+        generation = self._cache_generation
+
+        # Concurrent reads on an expired cache share a single refill
+        async with self._cache_lock:
+            if generation != self._cache_generation:
+                # Reconfigured while waiting for the lock; read with the new config
+                return await self.get_readings(extra, **kwargs)
+
+            if (
+                self._cache_ts is not None
+                and time.monotonic() - self._cache_ts < self.cache_ttl
+            ):
+                return {key: self._cache_val}
+
+            output = await self._get_readings_impl()
+            if generation == self._cache_generation:
+                self._cache_val = output
+                self._cache_ts = time.monotonic()
+            return {key: output}
+
+    async def _resolve_natively(self) -> str:
+        return self._resolver()
+
+    async def _resolve_with_subprocess(self) -> str:
+        proc = await asyncio.create_subprocess_shell(
+            self.cmd, stdout=asyncio.subprocess.PIPE, start_new_session=True
+        )
+        try:
+            stdout, _ = await proc.communicate()
+        finally:
+            # Kill the shell and anything it spawned if the reading was cancelled
+            if proc.returncode is None:
+                try:
+                    os.killpg(proc.pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    # Already exited and reaped
+                    pass
+                await proc.wait()
+        return stdout.decode("utf-8").strip("\n")
 
     async def get_geometries(self):
         raise NotImplementedError
-    
\ No newline at end of file
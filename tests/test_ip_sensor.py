@@ -0,0 +1,190 @@
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from google.protobuf.struct_pb2 import Struct
+from viam.proto.app.robot import ComponentConfig
+
+from src import ip_sensor
+from src.ip_sensor import DEFAULT_CACHE_TTL, IP_LOOKUP_CMDS, NATIVE_RESOLVERS, IPSensor
+
+
+def make_config(**attributes) -> ComponentConfig:
+    struct = Struct()
+    struct.update(attributes)
+    return ComponentConfig(name="ip", attributes=struct)
+
+
+def count_readings(sensor: IPSensor) -> list:
+    """Make the sensor's reading the number of times its command has run."""
+    calls = []
+
+    async def impl():
+        calls.append(None)
+        await asyncio.sleep(0)
+        return str(len(calls))
+
+    sensor._get_readings_impl = impl
+    return calls
+
+
+def test_readings_key_includes_cmd():
+    sensor = IPSensor.new(make_config(cmd="echo hi"), {})
+    assert asyncio.run(sensor.get_readings()) == {"echo hi: ": "hi"}
+
+
+@pytest.mark.skipif(
+    not sys.platform.startswith("linux"), reason="hostname -I is Linux-only"
+)
+def test_hostname_addresses_are_resolved_natively():
+    sensor = IPSensor.new(make_config(cmd="hostname -I"), {})
+    assert sensor._get_readings_impl == sensor._resolve_natively
+
+
+def test_native_resolvers_match_real_cmd():
+    for cmd, resolver in NATIVE_RESOLVERS.items():
+        real = subprocess.run(cmd, stdout=subprocess.PIPE, shell=True, check=True)
+        assert resolver() == real.stdout.decode("utf-8").strip("\n")
+
+
+def test_ip_lookup_cmds_are_cached_by_default():
+    for cmd in IP_LOOKUP_CMDS:
+        sensor = IPSensor.new(make_config(cmd=cmd), {})
+        assert sensor.cache_ttl == DEFAULT_CACHE_TTL
+
+    sensor = IPSensor.new(make_config(cmd="hostname -I", cache_ttl=0), {})
+    assert sensor.cache_ttl == 0.0
+
+
+def test_other_cmd_uses_subprocess_without_cache():
+    sensor = IPSensor.new(make_config(cmd="echo hi"), {})
+    assert sensor._get_readings_impl == sensor._resolve_with_subprocess
+    assert sensor.cache_ttl == 0.0
+
+    calls = count_readings(sensor)
+
+    async def read_twice():
+        await sensor.get_readings()
+        await sensor.get_readings()
+
+    asyncio.run(read_twice())
+    assert len(calls) == 2
+
+
+def test_cache_hit_and_expiry(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(ip_sensor.time, "monotonic", lambda: now[0])
+    sensor = IPSensor.new(make_config(cmd="echo hi", cache_ttl=5), {})
+    calls = count_readings(sensor)
+
+    async def read():
+        return await sensor.get_readings()
+
+    assert asyncio.run(read()) == {"echo hi: ": "1"}
+    now[0] += 4.9
+    assert asyncio.run(read()) == {"echo hi: ": "1"}
+    now[0] += 0.1
+    assert asyncio.run(read()) == {"echo hi: ": "2"}
+    assert len(calls) == 2
+
+
+def test_concurrent_reads_share_one_refill():
+    sensor = IPSensor.new(make_config(cmd="echo hi", cache_ttl=5), {})
+    calls = count_readings(sensor)
+
+    async def read_many():
+        return await asyncio.gather(*(sensor.get_readings() for _ in range(5)))
+
+    readings = asyncio.run(read_many())
+    assert len(calls) == 1
+    assert all(reading == {"echo hi: ": "1"} for reading in readings)
+
+
+def test_reconfigure_resets_cache():
+    sensor = IPSensor.new(make_config(cmd="echo hi", cache_ttl=60), {})
+    calls = count_readings(sensor)
+    asyncio.run(sensor.get_readings())
+
+    sensor.reconfigure(make_config(cmd="echo bye", cache_ttl=60), {})
+    assert asyncio.run(sensor.get_readings()) == {"echo bye: ": "bye"}
+    assert len(calls) == 1
+
+
+def test_reconfigure_during_read_keeps_new_cache_clean():
+    sensor = IPSensor.new(make_config(cmd="old", cache_ttl=60), {})
+    started = asyncio.Event()
+    release = asyncio.Event()
+
+    async def slow_impl():
+        started.set()
+        await release.wait()
+        return "OLD"
+
+    sensor._get_readings_impl = slow_impl
+
+    async def reconfigure_mid_read():
+        task = asyncio.create_task(sensor.get_readings())
+        await started.wait()
+        sensor.reconfigure(make_config(cmd="echo NEW", cache_ttl=60), {})
+        release.set()
+        return await task, await sensor.get_readings()
+
+    in_flight, after = asyncio.run(reconfigure_mid_read())
+    assert in_flight == {"old: ": "OLD"}
+    assert after == {"echo NEW: ": "NEW"}
+
+
+def live_group_members(pgid):
+    """Return the running (non-zombie) pids in process group pgid."""
+    members = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open("/proc/{}/stat".format(entry)) as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # Fields after the parenthesised command name: state, ppid, pgrp, ...
+        state, _, pgrp = stat.rsplit(")", 1)[1].split()[:3]
+        if int(pgrp) == pgid and state != "Z":
+            members.append(int(entry))
+    return members
+
+
+@pytest.mark.skipif(
+    not os.path.isdir("/proc"), reason="needs /proc to inspect processes"
+)
+def test_cancelled_reading_kills_cmd(monkeypatch):
+    # The trailing echo stops the shell exec-ing sleep, so the group has two processes
+    sensor = IPSensor.new(make_config(cmd="sleep 30; echo done"), {})
+    create_subprocess_shell = asyncio.create_subprocess_shell
+    procs = []
+
+    async def spy(*args, **kwargs):
+        proc = await create_subprocess_shell(*args, **kwargs)
+        procs.append(proc)
+        return proc
+
+    monkeypatch.setattr(ip_sensor.asyncio, "create_subprocess_shell", spy)
+
+    async def cancel_reading():
+        task = asyncio.create_task(sensor.get_readings())
+        while not procs:
+            await asyncio.sleep(0.01)
+        task.cancel()
+        # A surviving grandchild holds stdout open, which would stall the cancelled read
+        done, _ = await asyncio.wait({task}, timeout=5)
+        assert done and task.cancelled()
+
+        # SIGKILL delivery to the grandchild is asynchronous, so allow it a moment
+        deadline = time.monotonic() + 5
+        while live_group_members(procs[0].pid) and time.monotonic() < deadline:
+            await asyncio.sleep(0.01)
+        return live_group_members(procs[0].pid)
+
+    assert asyncio.run(cancel_reading()) == []